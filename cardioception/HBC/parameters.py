@@ -1,12 +1,11 @@
 # Author: Nicolas Legrand <nicolas.legrand@cfin.au.dk>
 
-import os
+from pathlib import Path
 from typing import Any, Dict, Optional
 
 import numpy as np
 import pandas as pd
 import pkg_resources
-import serial
 from psychopy import core, sound, visual
 from systole import serialSim
 from systole.recording import Oximeter, findOximeter
@@ -22,6 +21,7 @@ def getParameters(
     fullscr: bool = True,
     resultPath: Optional[str] = None,
     systole_kw: dict = {},
+    seed: Optional[int] = None,
 ) -> Dict:
     """Create Heartbeat Counting task parameters.
 
@@ -34,6 +34,9 @@ def getParameters(
     screenNb : int
         Screen number. Used to parametrize py:func:`psychopy.visual.Window`.
         Default is set to 0.
+    seed : int or None
+        Seed of the random number generator used to randomize the trials. If
+        `None` (default), fresh entropy is pulled from the OS.
     serialPort: str
         The USB port where the pulse oximeter is plugged. Should be written as
         a string e.g., 'COM3', 'COM4'. If set to *None*, the pulse oximeter
@@ -80,6 +83,8 @@ def getParameters(
         If *True*, a resting period will be proposed before the task.
     resultPath : str
         The subject result directory.
+    rng : `numpy.random.Generator`
+        The random number generator used to randomize the trials.
     screenNb : int
         The screen number (Psychopy parameter). Default set to 0.
     serial : `serial.Serial`
@@ -120,6 +125,7 @@ def getParameters(
     parameters["taskVersion"] = taskVersion
     parameters["results_df"] = pd.DataFrame({})
     parameters["setup"] = setup
+    parameters["rng"] = np.random.default_rng(seed)
 
     # Initialize triggers dictionary with None
     # Some or all can later be overwrited with callable
@@ -140,8 +146,9 @@ def getParameters(
     # The primary difference ebtween the two is the order of trials and the
     # use of resting periods between trials.
     if parameters["taskVersion"] == "Garfinkel":
-        parameters["times"] = np.array([25, 30, 35, 40, 45, 50])
-        np.random.shuffle(parameters["times"])
+        parameters["times"] = parameters["rng"].permutation(
+            np.array([25, 30, 35, 40, 45, 50])
+        )
         parameters["conditions"] = [
             "Count",
             "Count",
@@ -164,14 +171,14 @@ def getParameters(
     # Set default path /Results/ 'Subject ID' /
     parameters["participant"] = participant
     parameters["session"] = session
-    parameters["path"] = os.getcwd()
+    path = Path.cwd()
+    parameters["path"] = str(path)
     if resultPath is None:
-        parameters["resultPath"] = parameters["path"] + "/data/" + participant + session
+        parameters["resultPath"] = str(path / "data" / (participant + session))
     else:
         parameters["resultPath"] = resultPath
-    # Create Results directory of not already exists
-    if not os.path.exists(parameters["resultPath"]):
-        os.makedirs(parameters["resultPath"])
+    # Create Results directory if not already exists
+    Path(parameters["resultPath"]).mkdir(parents=True, exist_ok=True)
 
     # Set note played at trial start
     parameters["noteStart"] = sound.Sound(
@@ -214,6 +221,9 @@ def getParameters(
                 )
                 core.quit()
 
+        # Only required to record from a real pulse oximeter
+        import serial
+
         port = serial.Serial(serialPort)
         parameters["oxiTask"] = Oximeter(
             serial=port, sfreq=75, add_channels=1, **systole_kw
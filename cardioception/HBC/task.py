@@ -306,7 +306,7 @@ def trial(
         # Rating scale
         ##############
         if parameters["rating"] is True:
-            markerStart = np.random.choice(
+            markerStart = parameters["rng"].choice(
                 np.arange(parameters["confScale"][0], parameters["confScale"][1])
             )
             ratingScale = visual.RatingScale(
@@ -1,18 +1,107 @@
 # Author: Nicolas Legrand <nicolas.legrand@cfin.au.dk>
 
-import os
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import pkg_resources
-import serial
+from PIL import Image
 from psychopy import core, data, event, visual
 from systole import serialSim
 from systole.recording import Oximeter, findOximeter
 
 from cardioception.HRD.languages import danish, english
 
+STEP_SIZES = (20, 12, 12, 7, 4, 3, 2, 1)
+
+
+class LazyParameters(dict):
+    """Parameters dictionary creating expensive objects on first access.
+
+    The Psychopy window, the images and the staircases are registered as
+    factories and only built when the corresponding key is requested, so the
+    parameters can be created without a display (e.g. for testing or
+    offline analysis). Once built, the object is stored as a regular entry.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._factories: Dict[str, Callable[[], Any]] = {}
+
+    def register(self, key: str, factory: Callable[[], Any]):
+        """Register a factory building the value of `key` when first accessed."""
+        self._factories[key] = factory
+
+    def __setitem__(self, key: str, value: Any):
+        self._factories.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __missing__(self, key: str) -> Any:
+        if key not in self._factories:
+            raise KeyError(key)
+        self[key] = self._factories[key]()
+        return super().__getitem__(key)
+
+
+@lru_cache(maxsize=None)
+def _loadImage(fileName: str) -> Image.Image:
+    """Decode one of the task images.
+
+    The decoded images are cached so they are not read again from disk when
+    :py:func:`getParameters` is called several times (e.g. training and task).
+    """
+    with Image.open(pkg_resources.resource_filename(__name__, fileName)) as image:
+        return image.convert("RGBA")
+
+
+def _staircase(stairType: str, nTrials: int):
+    """Create the UpDown or Psi staircase used for one modality.
+
+    Parameters
+    ----------
+    stairType : str
+        Staircase type. Can be "psi" or "updown".
+    nTrials : int
+        Number of trials.
+
+    Returns
+    -------
+    staircase : :py:class:`psychopy.data.MultiStairHandler` or \
+        :py:class:`psychopy.data.PsiHandler`
+        The staircase instance.
+    """
+    if stairType == "updown":
+        conditions = [
+            {
+                "label": label,
+                "startVal": startVal,
+                "nUp": 1,
+                "nDown": 1,
+                "stepSizes": list(STEP_SIZES),
+                "stepType": "lin",
+                "minVal": -40.5,
+                "maxVal": 40.5,
+            }
+            for label, startVal in [("low", -40.5), ("high", 40.5)]
+        ]
+        return data.MultiStairHandler(conditions=conditions, nTrials=nTrials)
+
+    elif stairType == "psi":
+        return data.PsiHandler(
+            nTrials=nTrials,
+            intensRange=[-50.5, 50.5],
+            alphaRange=[-50.5, 50.5],
+            betaRange=[0.1, 25],
+            intensPrecision=1,
+            alphaPrecision=1,
+            betaPrecision=0.1,
+            delta=0.02,
+            stepType="lin",
+            expectedMin=0,
+        )
+
 
 def getParameters(
     participant: str = "SubjectTest",
@@ -31,6 +120,7 @@ def getParameters(
     resultPath: Optional[str] = None,
     language: str = "english",
     systole_kw: dict = {},
+    seed: Optional[int] = None,
 ):
     """Create Heart Rate Discrimination task parameters.
 
@@ -74,6 +164,9 @@ def getParameters(
     screenNb : int
         Screen number. Used to parametrize py:func:`psychopy.visual.Window`.
         Default is set to 0.
+    seed : int or None
+        Seed of the random number generator used to randomize the trials. If
+        `None` (default), fresh entropy is pulled from the OS.
     serialPort: str
         The USB port where the pulse oximeter is plugged. Should be written as
         a string e.g., `'COM3'`, `'COM4'`. If set to *None*, the pulse oximeter
@@ -117,6 +210,11 @@ def getParameters(
         threshold) across trials for the interoceptive condition.
     listenLogo, heartLogo : Psychopy visual instance
         Image used for the inference and recording phases, respectively.
+    Modality : 1d array-like of int8
+        Vector indexing the modality of each trial (`0` for `'Intero'` and `1`
+        for `'Extero'`).
+    ModalityLabels : 1d array-like of str
+        The modality labels, indexed by the codes in `Modality`.
     maxRatingTime : float
         The maximum time for a confidence rating (in seconds).
     minRatingTime : float
@@ -144,6 +242,9 @@ def getParameters(
         The task working directory.
     resultPath : str or None
         Where to save the results.
+    rng : `numpy.random.Generator`
+        The random number generator used to randomize the trials and the
+        stimuli.
     serial : PySerial instance
         The serial port used to record the PPG activity.
     screenNb : int
@@ -198,8 +299,11 @@ def getParameters(
     All these events, except trial start, have also their time stamps
     encoded in the behavioral results data frame.
 
+    The Psychopy window, the images, the mouse and the staircases are only
+    created when first accessed (see :py:class:`LazyParameters`).
+
     """
-    parameters: Dict[str, Any] = {}
+    parameters = LazyParameters()
     parameters["ExteroCondition"] = exteroception
     parameters["device"] = device
     if parameters["device"] == "keyboard":
@@ -220,6 +324,7 @@ def getParameters(
     parameters["lambdaIntero"] = []  # Save the history of lambda values
     parameters["lambdaExtero"] = []  # Save the history of lambda values
     parameters["nFinger"] = None
+    parameters["rng"] = np.random.default_rng(seed)
     parameters["signal_df"] = pd.DataFrame([])  # Physiological recording
     parameters["results_df"] = pd.DataFrame([])  # Behavioral results
 
@@ -240,14 +345,14 @@ def getParameters(
     # Set default path /Results/ 'Subject ID' /
     parameters["participant"] = participant
     parameters["session"] = session
-    parameters["path"] = os.getcwd()
+    path = Path.cwd()
+    parameters["path"] = str(path)
     if resultPath is None:
-        parameters["resultPath"] = parameters["path"] + "/data/" + participant + session
+        parameters["resultPath"] = str(path / "data" / (participant + session))
     else:
-        parameters["resultPath"] = None
+        parameters["resultPath"] = resultPath
     # Create Results directory if not already exists
-    if not os.path.exists(parameters["resultPath"]):
-        os.makedirs(parameters["resultPath"])
+    Path(parameters["resultPath"]).mkdir(parents=True, exist_ok=True)
 
     # Store posterior in a dictionnary
     parameters["staircaisePosteriors"] = {}
@@ -258,133 +363,42 @@ def getParameters(
     nCatch = int(parameters["nTrials"] * catchTrials)
     nStaircase = parameters["nTrials"] - nCatch
 
-    # Vector encoding the staircase type
-    if stairType == "psi":
-        sc = np.array(["psi"] * nStaircase)
-    elif stairType == "updown":
-        sc = np.array(["updown"] * nStaircase)
-    else:
+    if stairType not in ["psi", "updown"]:
         raise ValueError("stairType should be 'psi' or 'updown'")
 
-    # Create and randomize condition vectors separately for each staircase
+    # Trial plan storing the modality and the staircase type of each trial in a
+    # single array so both vectors are shuffled together.
+    # The modalities are encoded as int8 codes indexing parameters["ModalityLabels"]
+    parameters["ModalityLabels"] = np.array(["Intero", "Extero"])
+    trials = np.zeros(
+        parameters["nTrials"], dtype=[("Modality", np.int8), ("staircaseType", "U10")]
+    )
     if exteroception is True:
-        # Create a modality vector containing nTrials/2 Intero and Extero conditions
-        parameters["Modality"] = np.hstack(
-            [np.array(["Extero", "Intero"] * int(parameters["nTrials"] / 2))]
-        )
-    elif exteroception is False:
-        # Create a modality vector containing nTrials/2 Intero and Extero conditions
-        parameters["Modality"] = np.array(["Intero"] * int(parameters["nTrials"]))
-    else:
+        # nTrials/2 Extero conditions, the remaining trials are Intero
+        trials["Modality"][: parameters["nTrials"] // 2] = 1
+    elif exteroception is not False:
         raise ValueError("exteroception should be a boolean")
 
-    # Vector encoding the type of trial (psi, up/down or catch)
-    parameters["staircaseType"] = np.hstack(
-        [
-            sc,
-            np.array(["CatchTrial"] * int((parameters["nTrials"] * catchTrials))),
-        ]
-    )
+    # Type of trial (psi, up/down or catch)
+    trials["staircaseType"][:nStaircase] = stairType
+    trials["staircaseType"][nStaircase:] = "CatchTrial"
 
     # Shuffle all trials
-    shuffler = np.random.permutation(parameters["nTrials"])
-    parameters["Modality"] = parameters["Modality"][shuffler]
-    parameters["staircaseType"] = parameters["staircaseType"][shuffler]
+    parameters["rng"].shuffle(trials)
+    parameters["Modality"] = trials["Modality"]
+    parameters["staircaseType"] = trials["staircaseType"]
 
-    # Default parameters for the basic staircase are set here. Please see
+    # Default parameters for the basic staircase are set in _staircase(). See
     # PsychoPy Staircase Handler Documentation for full options. By default,
     # the task implements a staircase using Psi method.
     # If UpDown is selected, 1 or 2 interleaved staircases are used (see
     # options in parameters dictionary), one is initalized 'high' and the other
     # 'low'.
-    parameters["stairCase"] = {}
-
-    if stairType == "updown":
-
-        conditions = [
-            {
-                "label": "low",
-                "startVal": -40.5,
-                "nUp": 1,
-                "nDown": 1,
-                "stepSizes": [20, 12, 12, 7, 4, 3, 2, 1],
-                "stepType": "lin",
-                "minVal": -40.5,
-                "maxVal": 40.5,
-            },
-            {
-                "label": "high",
-                "startVal": 40.5,
-                "nUp": 1,
-                "nDown": 1,
-                "stepSizes": [20, 12, 12, 7, 4, 3, 2, 1],
-                "stepType": "lin",
-                "minVal": -40.5,
-                "maxVal": 40.5,
-            },
-        ]
-        parameters["stairCase"]["Intero"] = data.MultiStairHandler(
-            conditions=conditions, nTrials=parameters["nTrials"]
-        )
-
-    elif stairType == "psi":
-
-        parameters["stairCase"]["Intero"] = data.PsiHandler(
-            nTrials=nTrials,
-            intensRange=[-50.5, 50.5],
-            alphaRange=[-50.5, 50.5],
-            betaRange=[0.1, 25],
-            intensPrecision=1,
-            alphaPrecision=1,
-            betaPrecision=0.1,
-            delta=0.02,
-            stepType="lin",
-            expectedMin=0,
-        )
-
-    if exteroception is True:
-        if stairType == "updown":
-
-            conditions = [
-                {
-                    "label": "low",
-                    "startVal": -40.5,
-                    "nUp": 1,
-                    "nDown": 1,
-                    "stepSizes": [20, 12, 12, 7, 4, 3, 2, 1],
-                    "stepType": "lin",
-                    "minVal": -40.5,
-                    "maxVal": 40.5,
-                },
-                {
-                    "label": "high",
-                    "startVal": 40.5,
-                    "nUp": 1,
-                    "nDown": 1,
-                    "stepSizes": [20, 12, 12, 7, 4, 3, 2, 1],
-                    "stepType": "lin",
-                    "minVal": -40.5,
-                    "maxVal": 40.5,
-                },
-            ]
-            parameters["stairCase"]["Extero"] = data.MultiStairHandler(
-                conditions=conditions, nTrials=parameters["nTrials"]
-            )
+    def _make_stairs() -> Dict[str, Any]:
+        modalities = ["Intero", "Extero"] if exteroception is True else ["Intero"]
+        return {modality: _staircase(stairType, nTrials) for modality in modalities}
 
-        elif stairType == "psi":
-
-            parameters["stairCase"]["Extero"] = data.PsiHandler(
-                nTrials=nTrials,
-                intensRange=[-50.5, 50.5],
-                alphaRange=[-50.5, 50.5],
-                betaRange=[0.1, 25],
-                intensPrecision=1,
-                alphaPrecision=1,
-                betaPrecision=0.1,
-                delta=0.02,
-                stepType="lin",
-                expectedMin=0,
-            )
+    parameters.register("stairCase", _make_stairs)
 
     parameters["setup"] = setup
     if setup == "behavioral":
@@ -398,6 +412,9 @@ def getParameters(
                 )
                 core.quit()
 
+        # Only required to record from a real pulse oximeter
+        import serial
+
         port = serial.Serial(serialPort)
         parameters["oxiTask"] = Oximeter(
             serial=port, sfreq=75, add_channels=1, **systole_kw
@@ -424,58 +441,63 @@ def getParameters(
         parameters["texts"] = danish(
             device=device, setup=setup, exteroception=exteroception
         )
+    else:
+        raise ValueError("language should be 'english' or 'danish'")
 
     # Open window
     if parameters["setup"] == "test":
         fullscr = False
-    parameters["win"] = visual.Window(
-        monitor=parameters["monitor"],
-        screen=parameters["screenNb"],
-        fullscr=fullscr,
-        units="height",
-    )
-    parameters["win"].mouseVisible = False
+
+    def _make_win() -> visual.Window:
+        win = visual.Window(
+            monitor=parameters["monitor"],
+            screen=parameters["screenNb"],
+            fullscr=fullscr,
+            units="height",
+        )
+        win.mouseVisible = False
+        return win
+
+    parameters.register("win", _make_win)
 
     ###############
     # Image loading
     ###############
+    def _make_image(
+        fileName: str, pos: Tuple[float, float], scale: float
+    ) -> Callable[[], visual.ImageStim]:
+        def _make() -> visual.ImageStim:
+            image = visual.ImageStim(
+                win=parameters["win"],
+                units="height",
+                image=_loadImage(fileName),
+                pos=pos,
+            )
+            image.size *= scale
+            return image
+
+        return _make
+
     if parameters["setup"] in ["test", "behavioral"]:
-        parameters["pulseSchema"] = visual.ImageStim(
-            win=parameters["win"],
-            units="height",
-            image=pkg_resources.resource_filename(__name__, "Images/pulseOximeter.png"),
-            pos=(0.0, 0.0),
+        parameters.register(
+            "pulseSchema", _make_image("Images/pulseOximeter.png", (0.0, 0.0), 0.2)
         )
-        parameters["pulseSchema"].size *= 0.2
-        parameters["handSchema"] = visual.ImageStim(
-            win=parameters["win"],
-            units="height",
-            image=pkg_resources.resource_filename(__name__, "Images/hand.png"),
-            pos=(0.0, -0.08),
+        parameters.register(
+            "handSchema", _make_image("Images/hand.png", (0.0, -0.08), 0.15)
         )
-        parameters["handSchema"].size *= 0.15
 
-    parameters["listenLogo"] = visual.ImageStim(
-        win=parameters["win"],
-        units="height",
-        image=pkg_resources.resource_filename(__name__, "Images/listen.png"),
-        pos=(0.0, 0.0),
+    parameters.register(
+        "listenLogo", _make_image("Images/listen.png", (0.0, 0.0), 0.08)
     )
-    parameters["listenLogo"].size *= 0.08
-
-    parameters["heartLogo"] = visual.ImageStim(
-        win=parameters["win"],
-        units="height",
-        image=pkg_resources.resource_filename(__name__, "Images/heartbeat.png"),
-        pos=(0.0, 0.0),
+    parameters.register(
+        "heartLogo", _make_image("Images/heartbeat.png", (0.0, 0.0), 0.04)
     )
-    parameters["heartLogo"].size *= 0.04
     parameters["textSize"] = 0.04
     parameters["HRcutOff"] = [40, 120]
     parameters["BrainVisionIP"] = BrainVisionIP
     if parameters["device"] == "keyboard":
         parameters["confScale"] = [1, 10]
     elif parameters["device"] == "mouse":
-        parameters["myMouse"] = event.Mouse()
+        parameters.register("myMouse", lambda: event.Mouse(win=parameters["win"]))
 
     return parameters
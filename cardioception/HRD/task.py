@@ -30,6 +30,17 @@ def run(
         and 5 trials with confidence rating.
     """
 
+    # Create the window, images and staircases before the task starts (see
+    # :py:class:`cardioception.HRD.parameters.LazyParameters`) so building
+    # them does not delay the first stimuli after the triggers
+    for k in ["win", "heartLogo", "listenLogo", "stairCase"]:
+        parameters[k]
+    if parameters["device"] == "mouse":
+        parameters["myMouse"]
+    if parameters["setup"] in ["behavioral", "test"]:
+        parameters["pulseSchema"]
+        parameters["handSchema"]
+
     if parameters["setup"] in ["behavioral", "test"]:
         parameters["oxiTask"].setup().read(duration=1)
     elif parameters["setup"] == "fMRI":
@@ -48,11 +59,12 @@ def run(
     if runTutorial is True:
         tutorial(parameters)
 
-    for nTrial, modality, trialType in zip(
+    for nTrial, modalityCode, trialType in zip(
         range(parameters["nTrials"]),
         parameters["Modality"],
         parameters["staircaseType"],
     ):
+        modality = parameters["ModalityLabels"][modalityCode]
 
         # Initialize variable
         estimatedThreshold, estimatedSlope = None, None
@@ -94,7 +106,7 @@ def run(
             # of previous catch trial.
             catchIdx = sum(
                 parameters["staircaseType"][:nTrial][
-                    parameters["Modality"][:nTrial] == modality
+                    parameters["Modality"][:nTrial] == modalityCode
                 ]
                 == "CatchTrial"
             )
@@ -274,7 +286,7 @@ def run(
 
     # Save posterios (if relevant)
     print("Saving posterior distributions...")
-    for k in set(parameters["Modality"]):
+    for k in parameters["ModalityLabels"][np.unique(parameters["Modality"])]:
         np.save(
             parameters["resultPath"]
             + "/"
@@ -286,14 +298,19 @@ def run(
 
     # Save parameters
     print("Saving Parameters in pickle...")
+    # Objects that were never requested during the task are not created
     save_parameter = parameters.copy()
-    for k in ["win", "heartLogo", "listenLogo", "stairCase", "oxiTask"]:
-        del save_parameter[k]
-    if parameters["device"] == "mouse":
-        del save_parameter["myMouse"]
-    if parameters["setup"] in ["test", "behavioral"]:
-        del save_parameter["handSchema"]
-        del save_parameter["pulseSchema"]
+    for k in [
+        "win",
+        "heartLogo",
+        "listenLogo",
+        "stairCase",
+        "oxiTask",
+        "myMouse",
+        "handSchema",
+        "pulseSchema",
+    ]:
+        save_parameter.pop(k, None)
     with open(
         save_parameter["resultPath"]
         + "/"
@@ -414,7 +431,7 @@ def trial(
     fixation.draw()
     parameters["win"].flip()
     parameters["triggers"]["trialStart"]  # Send triggers
-    core.wait(np.random.uniform(parameters["isi"][0], parameters["isi"][1]))
+    core.wait(parameters["rng"].uniform(parameters["isi"][0], parameters["isi"][1]))
 
     keys = event.getKeys()
     if "escape" in keys:
@@ -523,7 +540,7 @@ def trial(
         parameters["triggers"]["listeningStart"]  # Send triggers
 
         # Random selection of HR frequency
-        listenBPM = np.random.choice(np.arange(40, 100, 0.5))
+        listenBPM = parameters["rng"].choice(np.arange(40, 100, 0.5))
 
         # Play the corresponding beat file
         listenFile = pkg_resources.resource_filename(
@@ -873,7 +890,7 @@ def tutorial(parameters: dict):
     for i in range(parameters["nFeedback"]):
 
         # Ramdom selection of condition
-        condition = np.random.choice(["More", "Less"])
+        condition = parameters["rng"].choice(["More", "Less"])
         alpha = -20.0 if condition == "Less" else 20.0
 
         _ = trial(
@@ -919,7 +936,7 @@ def tutorial(parameters: dict):
         for i in range(parameters["nFeedback"]):
 
             # Ramdom selection of condition
-            condition = np.random.choice(["More", "Less"])
+            condition = parameters["rng"].choice(["More", "Less"])
             alpha = -20.0 if condition == "Less" else 20.0
 
             _ = trial(
@@ -951,8 +968,8 @@ def tutorial(parameters: dict):
     # Run n training trials with confidence rating
     for i in range(parameters["nConfidence"]):
         modality = "Intero"
-        condition = np.random.choice(["More", "Less"])
-        stim_intense = np.random.choice(np.array([1, 10, 30]))
+        condition = parameters["rng"].choice(["More", "Less"])
+        stim_intense = parameters["rng"].choice(np.array([1, 10, 30]))
         alpha = -stim_intense if condition == "Less" else stim_intense
         _ = trial(parameters, alpha, modality, confidenceRating=True)
 
@@ -961,8 +978,8 @@ def tutorial(parameters: dict):
         # Run n training trials with confidence rating
         for i in range(parameters["nConfidence"]):
             modality = "Extero"
-            condition = np.random.choice(["More", "Less"])
-            stim_intense = np.random.choice(np.array([1, 10, 30]))
+            condition = parameters["rng"].choice(["More", "Less"])
+            stim_intense = parameters["rng"].choice(np.array([1, 10, 30]))
             alpha = -stim_intense if condition == "Less" else stim_intense
             _ = trial(
                 parameters,
@@ -1232,7 +1249,7 @@ def confidenceRatingTask(
 
     if parameters["device"] == "keyboard":
 
-        markerStart = np.random.choice(
+        markerStart = parameters["rng"].choice(
             np.arange(parameters["confScale"][0], parameters["confScale"][1])
         )
         ratingScale = visual.RatingScale(
@@ -1274,7 +1291,7 @@ def confidenceRatingTask(
         # To avoid being dragged out of the screen (in case of multi screens)
         # and to avoid interferences with the Slider when clicking.
         parameters["win"].mouseVisible = False
-        parameters["myMouse"].setPos((np.random.uniform(-0.25, 0.25), 0.2))
+        parameters["myMouse"].setPos((parameters["rng"].uniform(-0.25, 0.25), 0.2))
         parameters["myMouse"].clickReset()
         message = visual.TextStim(
             parameters["win"],
@@ -4,7 +4,6 @@ import os
 import subprocess
 from typing import Optional
 
-import papermill as pm
 import pkg_resources
 
 
@@ -21,6 +20,9 @@ def report(resultPath: str, reportPath: Optional[str] = None, task: str = "HRD")
     task : str, optional
         The task ("HRD" or "HBC"), by default "HRD".
     """
+    # papermill pulls the whole Jupyter stack, only import it when needed
+    import papermill as pm
+
     if reportPath is None:
         reportPath = resultPath
     temp_notebook = os.path.join(reportPath, "temp.ipynb")
@@ -3,7 +3,9 @@
 # Running short blocks of the task for testing.
 # Shoult not be used for data acquisition
 
+import os
 import shutil
+import tempfile
 import unittest
 from unittest import TestCase
 
@@ -23,10 +25,15 @@ class TestHRD(TestCase):
         parameters = getParameters(
             setup="test", nTrials=80, exteroception=True, stairType="psi"
         )
-        parameters["win"].close()
+
+        # The window, images and staircases are only created on first access
+        for k in ["win", "heartLogo", "listenLogo", "stairCase", "myMouse"]:
+            assert k not in parameters
 
         assert len(parameters["Modality"]) == 80
-        assert sum(parameters["Modality"] == "Extero") == 40
+        assert (
+            sum(parameters["ModalityLabels"][parameters["Modality"]] == "Extero") == 40
+        )
         assert len(parameters["staircaseType"]) == 80
         assert np.all(parameters["staircaseType"] == "psi")
 
@@ -37,14 +44,38 @@ class TestHRD(TestCase):
             stairType="updown",
             catchTrials=0.2,
         )
-        parameters["win"].close()
         shutil.rmtree(parameters["resultPath"])
 
-        assert sum(parameters["Modality"] == "Intero") == 2
+        assert (
+            sum(parameters["ModalityLabels"][parameters["Modality"]] == "Intero") == 2
+        )
         assert len(parameters["Modality"]) == 4
         assert len(parameters["staircaseType"]) == 4
         assert sum(parameters["staircaseType"] == "updown") == 4
 
+    def test_seed(self):
+        """Test the reproducibility of the trial order"""
+
+        parameters1 = getParameters(setup="test", nTrials=20, catchTrials=0.2, seed=1)
+        parameters2 = getParameters(setup="test", nTrials=20, catchTrials=0.2, seed=1)
+        shutil.rmtree(parameters1["resultPath"])
+
+        assert isinstance(parameters1["rng"], np.random.Generator)
+        assert np.array_equal(parameters1["Modality"], parameters2["Modality"])
+        assert np.array_equal(
+            parameters1["staircaseType"], parameters2["staircaseType"]
+        )
+
+    def test_resultPath(self):
+        """Test that a user-provided result path is created and kept"""
+
+        tempDir = tempfile.mkdtemp()
+        resultPath = os.path.join(tempDir, "results")
+        parameters = getParameters(setup="test", nTrials=4, resultPath=resultPath)
+        assert parameters["resultPath"] == resultPath
+        assert os.path.isdir(resultPath)
+        shutil.rmtree(tempDir)
+
     def test_run(self):
         """Test run function"""
 